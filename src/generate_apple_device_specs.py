@@ -1,21 +1,30 @@
 import requests
 import sqlite3
 import re
-import difflib
 import os
 import json
-import glob
+import hashlib
+import argparse
 from datetime import datetime
+from pathlib import PurePath
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from rapidfuzz import process, fuzz
 from typing import Dict, Any, Optional, List, Tuple
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
 # --- Apple Wiki Data ---
 APPLE_WIKI_API_URL = "https://theapplewiki.com/api.php"
 APPLE_WIKI_PAGES = {
     "iPhone": "List_of_iPhones",
     # Extend for iPad, Mac, etc.
 }
+# (connect, read) timeout in seconds for Apple Wiki API requests
+WIKI_REQUEST_TIMEOUT = (5, 30)
 
 # Board config to chip mapping from Apple Wiki
 BOARD_CHIP_MAPPING = {
@@ -77,6 +86,10 @@ BOARD_CHIP_MAPPING = {
     "d54pap": "A14",     # iPhone 12 Pro Max
 }
 
+# Single alternation of all board configs, longest first so the first match is the longest prefix
+_BOARD_KEYS = sorted(BOARD_CHIP_MAPPING, key=len, reverse=True)
+_BOARD_RE = re.compile("|".join(map(re.escape, _BOARD_KEYS)))
+
 def get_chip_from_board_config(target: str) -> str:
     """
     Get the chip name from the board config (target).
@@ -86,10 +99,10 @@ def get_chip_from_board_config(target: str) -> str:
     if target in BOARD_CHIP_MAPPING:
         return BOARD_CHIP_MAPPING[target]
     
-    # Try prefix match (e.g., 'd83' for iPhone 15 series)
-    for prefix, chip in BOARD_CHIP_MAPPING.items():
-        if target.startswith(prefix):
-            return chip
+    # Try longest prefix match (e.g., 'd83' for iPhone 15 series)
+    match = _BOARD_RE.match(target)
+    if match:
+        return BOARD_CHIP_MAPPING[match.group(0)]
     
     return "Unknown"
 
@@ -104,10 +117,19 @@ def find_xcode_databases() -> List[Tuple[str, str]]:
     if os.path.exists(standard_path):
         databases.append(("Xcode", standard_path))
     
-    # Check additional Xcode installations
-    beta_paths = glob.glob("/Applications/Xcode-*.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db")
+    # Check additional Xcode installations (Xcode-*.app) with a single directory read
+    beta_paths = []
+    try:
+        with os.scandir("/Applications") as entries:
+            for entry in entries:
+                if entry.name.startswith("Xcode-") and entry.name.endswith(".app"):
+                    path = f"/Applications/{entry.name}/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
+                    if os.path.exists(path):
+                        beta_paths.append(path)
+    except OSError:
+        pass
     for path in beta_paths:
-        app_name = os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(path))))))
+        app_name = PurePath(path).parts[-6]
         version = app_name
         databases.append((version, path))
     
@@ -116,38 +138,117 @@ def find_xcode_databases() -> List[Tuple[str, str]]:
 # --- Xcode device_traits.db ---
 DEFAULT_DB_PATH = "/Applications/Xcode.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
 
+# --- On-disk cache for Apple Wiki responses ---
+CACHE_DIR = ".cache"
+# Last RAM map parsed from the wikitext, tagged with the hash of the text and parser version it came from
+WIKI_RAM_CACHE_PATH = os.path.join(CACHE_DIR, "iphone_ram.json")
+# Bump whenever the wiki parser's output changes, so parses cached by an older version are not reused
+WIKI_PARSE_VERSION = 1
+
+def get_cache_key(key: str) -> str:
+    """Return the SHA-256 hex digest identifying a cache entry."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def get_cache_path(key: str, suffix: str) -> str:
+    """Return the cache file path for a key (hashed with SHA-256)."""
+    return os.path.join(CACHE_DIR, f"{get_cache_key(key)}{suffix}")
+
+def write_cache_json(path: str, data: Any) -> None:
+    """Write data to a cache file through a temporary file and os.replace, so an interrupted run never leaves it truncated."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+# --- Precompiled patterns for Apple Wiki parsing ---
+_SPLIT_RE = re.compile(r"==\s*\[\[(.*?)\]\]\s*==")
+_IPHONE_FILTER_RE = re.compile(r"iPhone\s*(XR|XS|1[1-9]|[2-9]\d)", re.IGNORECASE)
+_RAM_LINE_RE = re.compile(r"\*\s*RAM:\s*(.*?)\s*(?:\n|\r|$)", re.IGNORECASE)
+_RAM_RE = re.compile(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?')
+
 # --- Helper functions for Apple Wiki (fetching RAM and chip details) ---
 def create_retry_session():
     session = requests.Session()
     retries = Retry(
         total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"]
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=10, pool_maxsize=10)
     session.mount("https://", adapter)
+    session.mount("http://", adapter)
     return session
 
-def fetch_wiki_text(session, device_type="iPhone"):
+def fetch_wiki_revision_id(session, device_type="iPhone") -> Optional[int]:
+    """Return the latest revision id of the wiki page with a cheap prop=info query (no page content)."""
+    params = {
+        "action": "query",
+        "titles": APPLE_WIKI_PAGES[device_type],
+        "prop": "info",
+        "format": "json"
+    }
+    resp = session.get(APPLE_WIKI_API_URL, params=params, timeout=WIKI_REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    pages = resp.json()["query"]["pages"]
+    for page_id in pages:
+        if "lastrevid" in pages[page_id]:
+            return pages[page_id]["lastrevid"]
+    return None
+
+def load_cached_wiki_text(session, device_type, cache_path) -> Optional[str]:
+    """
+    Return the cached wikitext if it is still the page's latest revision, or None if it must be refetched.
+    If the revision check itself fails (e.g. offline), the cached text is used as-is.
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        revid, text = cached.get("revid"), cached["text"]
+    except (json.JSONDecodeError, AttributeError, KeyError) as e:
+        print(f"Warning: ignoring unreadable wiki cache {cache_path}: {e}")
+        return None
+    try:
+        latest = fetch_wiki_revision_id(session, device_type)
+    except requests.RequestException as e:
+        print(f"Warning: could not check the wiki revision ({e}); using cached wikitext")
+        return text
+    return text if revid is not None and revid == latest else None
+
+def fetch_wiki_text(session, device_type="iPhone", use_cache=True):
+    """
+    Fetch the wikitext of the device page. With use_cache, the copy cached under CACHE_DIR is
+    reused only while its revision id matches the page's latest revision.
+    """
     params = {
         "action": "query",
         "titles": APPLE_WIKI_PAGES[device_type],
         "prop": "revisions",
-        "rvprop": "content",
+        "rvprop": "content|ids",
         "format": "json"
     }
-    resp = session.get(APPLE_WIKI_API_URL, params=params)
+    cache_path = get_cache_path(APPLE_WIKI_API_URL + APPLE_WIKI_PAGES[device_type], ".wikitext.json")
+    if use_cache:
+        text = load_cached_wiki_text(session, device_type, cache_path)
+        if text is not None:
+            return text
+    resp = session.get(APPLE_WIKI_API_URL, params=params, timeout=WIKI_REQUEST_TIMEOUT)
     resp.raise_for_status()
     data = resp.json()
     pages = data["query"]["pages"]
     for page_id in pages:
         if "revisions" in pages[page_id]:
-            return pages[page_id]["revisions"][0]["*"]
+            revision = pages[page_id]["revisions"][0]
+            text = revision["*"]
+            write_cache_json(cache_path, {"revid": revision.get("revid"), "text": text})
+            return text
     raise RuntimeError("Wiki text not found!")
 
 def standardize_ram(ram_str):
     if ram_str == "Unknown":
         return ram_str
     ram_str = ram_str.strip().upper()
-    match = re.search(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?', ram_str)
+    match = _RAM_RE.search(ram_str)
     if not match:
         return ram_str
     number, unit = match.groups()
@@ -157,54 +258,72 @@ def standardize_ram(ram_str):
         unit = 'MB'
     return f"{number} {unit}"
 
-def extract_chip(block):
-    chip_match = re.search(r'\*\s*CPU:\s*(?:\[\[(.*?)\]\]\s*)?\"?([\w\d\s\-+]+)\"?', block)
-    if not chip_match:
-        return "Unknown"
-    chip = chip_match.group(2).strip()
-    a_chip_match = re.search(r'\bA\d+(?:\s*(?:Pro|X|Bionic|Fusion|B))?\b', chip)
-    if a_chip_match:
-        return a_chip_match.group(0)
-    if "S5L8900" in chip:
-        return "S5L8900"
-    elif "S5L8920" in chip:
-        return "S5L8920"
-    elif "S5L8930" in chip:
-        return "S5L8930"
-    elif "S5L8940" in chip:
-        return "S5L8940"
-    elif "S5L8942" in chip:
-        return "S5L8942"
-    elif "S5L8945" in chip:
-        return "S5L8945"
-    elif "S5L8950" in chip:
-        return "S5L8950"
-    elif "S5L8955" in chip:
-        return "S5L8955"
-    return "Unknown"
+def iter_wiki_entries(raw_text):
+    """Yield (name, block) for each '== [[name]] ==' section without splitting the whole text up front."""
+    prev_name = None
+    prev_end = 0
+    for match in _SPLIT_RE.finditer(raw_text):
+        if prev_name is not None:
+            yield prev_name, raw_text[prev_end:match.start()]
+        prev_name = match.group(1).strip()
+        prev_end = match.end()
+    if prev_name is not None:
+        yield prev_name, raw_text[prev_end:]
 
-def parse_wiki_devices(raw_text):
-    entries = re.split(r"==\s*\[\[(.*?)\]\]\s*==", raw_text)
-    data = {}
-    for i in range(1, len(entries), 2):
-        name = entries[i].strip()
-        block = entries[i + 1]
+def iter_recent_iphone_entries(raw_text):
+    """Yield (name, block) for wiki sections describing iPhone XR/XS and newer."""
+    for name, block in iter_wiki_entries(raw_text):
         if name.startswith("File:"): continue
         # Only include iPhone XR/XS and newer (iPhone 11 or higher)
         # Match 'iPhone XR', 'iPhone XS', or 'iPhone <number>' where number >= 11
-        if not (re.search(r"iPhone\s*(XR|XS|1[1-9]|[2-9][0-9])", name, re.IGNORECASE) or re.search(r"iPhone\s*(XR|XS|1[1-9]|[2-9][0-9])", block, re.IGNORECASE)):
+        # Check the short name first; only scan the whole block when the name doesn't match
+        if not (_IPHONE_FILTER_RE.search(name) or _IPHONE_FILTER_RE.search(block)):
             continue
-        chip = extract_chip(block)
-        ram_match = re.search(r"\*\s*RAM:\s*(.*?)\s*(?:\n|\r|$)", block, re.IGNORECASE)
-        ram = ram_match.group(1).strip() if ram_match else "Unknown"
-        ram = standardize_ram(ram)
-        data[name] = {
-            "chip": chip,
-            "ram": ram
-        }
+        yield name, block
+
+def extract_ram(block):
+    ram_match = _RAM_LINE_RE.search(block)
+    ram = ram_match.group(1).strip() if ram_match else "Unknown"
+    return standardize_ram(ram)
+
+def parse_wiki_ram(raw_text):
+    """
+    Parse the RAM of each device.
+    Chips come from BOARD_CHIP_MAPPING when building the menu, so the wiki CPU lines are not read.
+    """
+    return { name: extract_ram(block) for name, block in iter_recent_iphone_entries(raw_text) }
+
+def parse_wiki_ram_cached(raw_text, use_cache=True):
+    """
+    Parse the wiki RAM map, reusing the previous parse if it came from the same wikitext.
+    WIKI_RAM_CACHE_PATH holds a single parse keyed by the hash of the raw text and WIKI_PARSE_VERSION,
+    so a new page revision or a parser change invalidates it and the new parse replaces it.
+    An unreadable cache file is treated as a miss.
+    """
+    key = get_cache_key(f"{WIKI_PARSE_VERSION}\n{raw_text}")
+    if use_cache and os.path.exists(WIKI_RAM_CACHE_PATH):
+        try:
+            with open(WIKI_RAM_CACHE_PATH, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == key and isinstance(cached.get("ram"), dict):
+                return cached["ram"]
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            print(f"Warning: ignoring unreadable parse cache {WIKI_RAM_CACHE_PATH}: {e}")
+    data = parse_wiki_ram(raw_text)
+    write_cache_json(WIKI_RAM_CACHE_PATH, {"key": key, "ram": data})
+    # Earlier versions kept one hash-named parse file per page revision; drop any left behind
+    with os.scandir(CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".ram.json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
     return data
 
 # --- Helper functions for Xcode device_traits.db (menu JSON generation) ---
+_SKU_RE = re.compile(r"iPhone(\d+),")
+
 def get_db_connection(db_path: str = DEFAULT_DB_PATH) -> Optional[sqlite3.Connection]:
     if not os.path.exists(db_path):
         print(f"Warning: device_traits.db not found at {db_path}")
@@ -241,6 +360,8 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
         """)
         menu = {}
         unknown_chips = {}
+        ram_keys = list(ram_map) if ram_map else []
+        pending_ram = []
         for row in cursor.fetchall():
             model_name = row[0]
             sku = row[1]
@@ -249,7 +370,7 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
             # Print board config for iPhone 12 series
             if model_name in ["iPhone 12", "iPhone 12 mini", "iPhone 12 Pro", "iPhone 12 Pro Max"]:
                 print(f"DEBUG: {model_name} (SKU: {sku}) has board config: {target}")
-            match = re.match(r"iPhone(\d+),", sku)
+            match = _SKU_RE.match(sku)
             if not match:
                 continue
             major_version = int(match.group(1))
@@ -263,9 +384,8 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
             if ram_map:
                 ram = ram_map.get(model_name)
                 if not ram:
-                    close = difflib.get_close_matches(model_name, ram_map.keys(), n=1, cutoff=0.85)
-                    if close:
-                        ram = ram_map[close[0]]
+                    # Fuzzy-matched in a single batch once all rows are read
+                    pending_ram.append((model_name, major_version))
             
             # For iPhone 17 series, default to 8 GB if no RAM data found
             if major_version == 18 and (ram == "Unknown" or ram is None):
@@ -276,6 +396,15 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
                 "ram": ram,
                 "board_config": target
             }
+        # Score all names without an exact wiki match against the RAM map in one call
+        if pending_ram:
+            scores = process.cdist([name for name, _ in pending_ram], ram_keys, scorer=fuzz.ratio, score_cutoff=85, workers=-1)
+            for (model_name, major_version), row_scores in zip(pending_ram, scores):
+                best = int(row_scores.argmax())
+                ram = ram_map[ram_keys[best]] if row_scores[best] >= 85 else None
+                if major_version == 18 and (ram == "Unknown" or ram is None):
+                    ram = "8 GB"
+                menu[model_name]["ram"] = ram
         if unknown_chips:
             print("\nDevices with unknown chips (board configs):")
             for model, board_config in unknown_chips.items():
@@ -295,8 +424,27 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
     finally:
         conn.close()
 
+# --- JSON output ---
+def write_json(path: str, data: Dict[str, Any], pretty: bool = True) -> None:
+    """Write data to path as JSON (2-space indented unless pretty is False), using orjson when installed."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if pretty:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+
 # --- Main function ---
 def main():
+    parser = argparse.ArgumentParser(description="Generate apple/iPhone.json from Xcode and Apple Wiki data.")
+    parser.add_argument("--no-cache", action="store_true", help=f"Ignore cached Apple Wiki data in {CACHE_DIR}/ and fetch it again")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of 2-space indented output")
+    args = parser.parse_args()
+    use_cache = not args.no_cache
+
     os.makedirs("apple", exist_ok=True)
     
     # Find available Xcode databases
@@ -313,14 +461,13 @@ def main():
     selected_version, selected_path = available_dbs[0] if available_dbs else (None, None)
     print(f"\nUsing {selected_version} database...")
     
-    # Fetch Apple Wiki data (for chip and RAM details)
+    # Fetch Apple Wiki data (for RAM details)
     print("Fetching Apple Wiki data for iPhone...")
     session = create_retry_session()
-    wiki_raw = fetch_wiki_text(session, device_type="iPhone")
-    wiki_devices = parse_wiki_devices(wiki_raw)
+    wiki_raw = fetch_wiki_text(session, "iPhone", use_cache)
     
     # Generate a RAM map (from Apple Wiki) for merging into the menu JSON
-    ram_map = { name: meta["ram"] for name, meta in wiki_devices.items() }
+    ram_map = parse_wiki_ram_cached(wiki_raw, use_cache=use_cache)
     
     # Generate the device menu JSON (using device_traits.db and ram_map)
     print(f"Generating iPhone device menu (from {selected_version}) with RAM details...")
@@ -341,8 +488,7 @@ def main():
         "total_menu": total_menu
     }
     
-    with open("apple/iPhone.json", "w") as f:
-        json.dump(final, f, indent=2)
+    write_json("apple/iPhone.json", final, pretty=not args.compact)
     print(f"Done — iPhone menu saved to apple/iPhone.json (using {selected_version})")
 
 if __name__ == "__main__":
@@ -1,22 +1,33 @@
 import requests
 import sqlite3
 import re
-import difflib
 import os
 import json
 import glob
+import argparse
 from datetime import datetime
+from pathlib import Path, PurePath
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from rapidfuzz import process, fuzz
 from typing import Dict, Any, Optional, List, Tuple
 import string
+import functools
 import subprocess
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
 # --- Apple Wiki Data ---
 APPLE_WIKI_API_URL = "https://theapplewiki.com/api.php"
 APPLE_WIKI_PAGES = {
     "iPad": "List_of_iPads",
 }
+# (connect, read) timeout in seconds for Apple Wiki API requests
+WIKI_REQUEST_TIMEOUT = (5, 30)
 
 # Board config to chip mapping from Apple Wiki (adapted from iPhone mapping, but this may be incomplete for iPad)
 BOARD_CHIP_MAPPING = {
@@ -83,14 +94,6 @@ MANUAL_SKU_OVERRIDE = {
     "iPad Pro (12.9-inch) (5th generation)": "iPad13,8 iPad13,9 iPad13,10 iPad13,11"
 }
 
-def get_chip_from_board_config(target: str) -> str:
-    if target in BOARD_CHIP_MAPPING:
-        return BOARD_CHIP_MAPPING[target]
-    for prefix, chip in BOARD_CHIP_MAPPING.items():
-        if target.startswith(prefix):
-            return chip
-    return "Unknown"
-
 def find_xcode_databases() -> List[Tuple[str, str]]:
     databases = []
     standard_path = "/Applications/Xcode.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
@@ -98,43 +101,82 @@ def find_xcode_databases() -> List[Tuple[str, str]]:
         databases.append(("Xcode", standard_path))
     beta_paths = glob.glob("/Applications/Xcode-*.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db")
     for path in beta_paths:
-        version = os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(path))))))
+        version = PurePath(path).parts[-6]
         databases.append((version, path))
     return sorted(databases, key=lambda x: x[0])
 
 DEFAULT_DB_PATH = "/Applications/Xcode.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
 
+# --- On-disk cache for parsed Apple Wiki data ---
+CACHE_DIR = ".cache"
+WIKI_CACHE_PATH = os.path.join(CACHE_DIR, "ipad_wiki.json")
+# Bump whenever parse_wiki_devices' output changes, so devices cached by an older parser are not reused
+WIKI_PARSE_VERSION = 1
+
+# --- Precompiled patterns for Apple Wiki parsing and SKU cleanup ---
+# Section headers, CPU lines and RAM lines, matched in a single pass over the wikitext.
+# CPU and RAM values are captured in lookaheads that never run past the next section header, so
+# they read exactly what a search confined to the section would, without consuming that text.
+_WIKI_TOKEN_RE = re.compile(
+    r'==\s*\[\[(?P<name>.*?)\]\]\s*=='
+    r'|\*\s*CPU:(?=\s*(?:\[\[(?P<cpu_link>(?:(?!==\s*\[\[.*?\]\]\s*==).)*?)\]\]\s*)?"?(?P<cpu>[\w\d\s\-+]+))'
+    r'|(?i:\*\s*RAM:(?=\s*(?P<ram>(?:(?!==\s*\[\[.*?\]\]\s*==)[^\n\r])*)))'
+)
+_IPAD_RE = re.compile(r"iPad", re.IGNORECASE)
+_A_CHIP_RE = re.compile(r'\bA\d+(?:\s*(?:Pro|X|Bionic|Fusion|B))?\b')
+_RAM_RE = re.compile(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?')
+_A_CHIP_VERSION_RE = re.compile(r"A(\d+)")
+_SKU_SUFFIX_RE = re.compile(r'-[A-Z]$')
+_SKU_SORT_RE = re.compile(r"iPad(\d+),(\d+)")
+
 def create_retry_session():
     session = requests.Session()
     retries = Retry(
         total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"]
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=2, pool_maxsize=2)
     session.mount("https://", adapter)
     return session
 
-def fetch_wiki_text(session, device_type="iPad"):
+def fetch_wiki_revision_id(session, device_type="iPad") -> Optional[int]:
+    """Return the latest revision id of the wiki page with a cheap prop=info query (no page content)."""
+    params = {
+        "action": "query",
+        "titles": APPLE_WIKI_PAGES[device_type],
+        "prop": "info",
+        "format": "json"
+    }
+    resp = session.get(APPLE_WIKI_API_URL, params=params, timeout=WIKI_REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    pages = resp.json()["query"]["pages"]
+    for page_id in pages:
+        if "lastrevid" in pages[page_id]:
+            return pages[page_id]["lastrevid"]
+    return None
+
+def fetch_wiki_revision(session, device_type="iPad") -> Dict[str, Any]:
+    """Return the latest revision of the wiki page, including its content ('*'), 'revid' and 'timestamp'."""
     params = {
         "action": "query",
         "titles": APPLE_WIKI_PAGES[device_type],
         "prop": "revisions",
-        "rvprop": "content",
+        "rvprop": "content|ids|timestamp",
         "format": "json"
     }
-    resp = session.get(APPLE_WIKI_API_URL, params=params)
+    resp = session.get(APPLE_WIKI_API_URL, params=params, timeout=WIKI_REQUEST_TIMEOUT)
     resp.raise_for_status()
     data = resp.json()
     pages = data["query"]["pages"]
     for page_id in pages:
         if "revisions" in pages[page_id]:
-            return pages[page_id]["revisions"][0]["*"]
+            return pages[page_id]["revisions"][0]
     raise RuntimeError("Wiki text not found!")
 
 def standardize_ram(ram_str):
     if ram_str == "Unknown":
         return ram_str
     ram_str = ram_str.strip().upper()
-    match = re.search(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?', ram_str)
+    match = _RAM_RE.search(ram_str)
     if not match:
         return ram_str
     number, unit = match.groups()
@@ -144,60 +186,135 @@ def standardize_ram(ram_str):
         unit = 'MB'
     return f"{number} {unit}"
 
-def extract_chip(block):
-    chip_match = re.search(r'\*\s*CPU:\s*(?:\[\[(.*?)\]\]\s*)?"?([\w\d\s\-+]+)"?', block)
-    if not chip_match:
+def chip_from_cpu(cpu):
+    """Return the A-series chip named in a wiki CPU field, or 'Unknown'."""
+    if cpu is None:
         return "Unknown"
-    chip = chip_match.group(2).strip()
-    a_chip_match = re.search(r'\bA\d+(?:\s*(?:Pro|X|Bionic|Fusion|B))?\b', chip)
+    a_chip_match = _A_CHIP_RE.search(cpu)
     if a_chip_match:
         return a_chip_match.group(0)
     return "Unknown"
 
+def add_wiki_device(data, raw_text, name, start, end, cpu, ram):
+    """Record the section raw_text[start:end] under name if it describes an iPad."""
+    if name is None or name.startswith("File:"):
+        return
+    if not (_IPAD_RE.search(name) or _IPAD_RE.search(raw_text, start, end)):
+        return
+    data[name] = {
+        "chip": chip_from_cpu(cpu),
+        "ram": standardize_ram(ram if ram is not None else "Unknown")
+    }
+
 def parse_wiki_devices(raw_text):
-    entries = re.split(r"==\s*\[\[(.*?)\]\]\s*==", raw_text)
+    """
+    Parse '== [[name]] ==' sections in one pass over the wikitext, taking the
+    first CPU and RAM line of each section.
+    """
     data = {}
-    for i in range(1, len(entries), 2):
-        name = entries[i].strip()
-        block = entries[i + 1]
-        if name.startswith("File:"): continue
-        if not (re.search(r"iPad", name, re.IGNORECASE) or re.search(r"iPad", block, re.IGNORECASE)):
-            continue
-        chip = extract_chip(block)
-        ram_match = re.search(r"\*\s*RAM:\s*(.*?)\s*(?:\n|\r|$)", block, re.IGNORECASE)
-        ram = ram_match.group(1).strip() if ram_match else "Unknown"
-        ram = standardize_ram(ram)
-        data[name] = {
-            "chip": chip,
-            "ram": ram
-        }
+    name = None
+    start = 0
+    cpu = ram = None
+    for match in _WIKI_TOKEN_RE.finditer(raw_text):
+        if match.group("name") is not None:
+            add_wiki_device(data, raw_text, name, start, match.start(), cpu, ram)
+            name = match.group("name").strip()
+            start = match.end()
+            cpu = ram = None
+        elif match.group("cpu") is not None:
+            if cpu is None:
+                cpu = match.group("cpu").strip()
+        elif ram is None:
+            ram = match.group("ram").strip()
+    add_wiki_device(data, raw_text, name, start, len(raw_text), cpu, ram)
     return data
 
+def load_wiki_devices(session, device_type="iPad", use_cache=True) -> Dict[str, Dict[str, str]]:
+    """
+    Return parsed wiki devices, skipping the page download and parse when WIKI_CACHE_PATH holds
+    the latest revision, parsed by the current WIKI_PARSE_VERSION.
+    """
+    cached = None
+    if use_cache and os.path.exists(WIKI_CACHE_PATH):
+        try:
+            with open(WIKI_CACHE_PATH, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("parser_version") != WIKI_PARSE_VERSION or not isinstance(cached.get("devices"), dict):
+                cached = None
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"Warning: ignoring unreadable wiki cache {WIKI_CACHE_PATH}: {e}")
+            cached = None
+    if cached is not None:
+        try:
+            latest_revid = fetch_wiki_revision_id(session, device_type)
+        except (requests.RequestException, KeyError) as e:
+            # The cache is still a complete parse; prefer it over failing the run on a flaky probe
+            print(f"Warning: could not check the wiki revision ({e}); using cached wiki data")
+            return cached["devices"]
+        if cached.get("revid") is not None and cached["revid"] == latest_revid:
+            return cached["devices"]
+    revision = fetch_wiki_revision(session, device_type)
+    devices = parse_wiki_devices(revision["*"])
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(WIKI_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"parser_version": WIKI_PARSE_VERSION, "revid": revision.get("revid"), "timestamp": revision.get("timestamp"), "devices": devices}, f)
+    return devices
+
 def get_db_connection(db_path: str = DEFAULT_DB_PATH) -> Optional[sqlite3.Connection]:
     if not os.path.exists(db_path):
         print(f"Warning: device_traits.db not found at {db_path}")
         return None
+    conn = None
     try:
-        return sqlite3.connect(db_path)
+        # Read-only, immutable open (as for the Mac database): no journal, no file locking and no implicit BEGIN.
+        # as_uri() percent-escapes the path, so characters like '#' or '?' can't be read as URI syntax.
+        uri = f"{Path(db_path).absolute().as_uri()}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, isolation_level=None)
+        # Let SQLite mmap the file and keep a larger page cache for the full-table scan
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
     except sqlite3.Error as e:
+        if conn is not None:
+            conn.close()
         print(f"Error connecting to database: {e}")
         return None
 
+# Translation table that deletes punctuation and spaces
+_NORM_TABLE = str.maketrans('', '', string.punctuation + ' ')
+
+@functools.lru_cache(maxsize=4096)
 def normalize_name(name):
     # Lowercase, remove punctuation, and strip spaces
-    return ''.join(c for c in name.lower() if c not in string.punctuation).replace(' ', '')
+    return name.lower().translate(_NORM_TABLE)
 
-def get_ipad_family(name: str) -> str:
-    """Identifies the family of an iPad model (Pro, Air, mini, or iPad)."""
-    name_lower = name.lower()
-    if "pro" in name_lower:
+# Manual overrides keyed by normalized name, so they still apply if Xcode's punctuation or spacing changes
+_MANUAL_RAM_NORM = {normalize_name(k): v for k, v in MANUAL_RAM_OVERRIDE.items()}
+_MANUAL_CHIP_NORM = {normalize_name(k): v for k, v in MANUAL_CHIP_OVERRIDE.items()}
+
+def get_ipad_family_norm(norm_name: str) -> str:
+    """Identifies the family of an iPad model (Pro, Air, mini, or iPad) from a name already lowercased by normalize_name."""
+    if "pro" in norm_name:
         return "pro"
-    if "air" in name_lower:
+    if "air" in norm_name:
         return "air"
-    if "mini" in name_lower:
+    if "mini" in norm_name:
         return "mini"
     return "ipad"
 
+def batch_fuzzy_match(queries: List[str], choices: List[str], mapping: Dict[str, str], score_cutoff: int = 80) -> Dict[str, str]:
+    """Score all queries against all choices in one rapidfuzz cdist call and return {query: mapping[best choice]}."""
+    if not queries or not choices:
+        return {}
+    scores = process.cdist(queries, choices, scorer=fuzz.ratio, score_cutoff=score_cutoff, workers=-1)
+    matches = {}
+    for query, row_scores in zip(queries, scores):
+        best = int(row_scores.argmax())
+        if row_scores[best] >= score_cutoff:
+            matches[query] = mapping[choices[best]]
+    return matches
+
 def is_chip_at_least_a12(chip: str) -> bool:
     """Return True if chip is A12 or newer, or any M-series chip."""
     if not chip or chip == "Unknown":
@@ -205,7 +322,7 @@ def is_chip_at_least_a12(chip: str) -> bool:
     chip = chip.strip().upper()
     if chip.startswith("M"):
         return True
-    match = re.match(r"A(\d+)", chip)
+    match = _A_CHIP_VERSION_RE.match(chip)
     if match:
         try:
             return int(match.group(1)) >= 12
@@ -251,7 +368,7 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
         """)
         # Group rows by ProductDescription
         device_rows = {}
-        for row in cursor.fetchall():
+        for row in cursor:
             model_name = row[0]
             if model_name not in device_rows:
                 device_rows[model_name] = []
@@ -259,30 +376,39 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
         menu = {}
         unmatched_chips = []
         unmatched_ram = []
+        seen_models = set()
+        duplicates = []
         # Build normalized maps for Wiki data
         norm_chip_map = {normalize_name(k): v for k, v in chip_map.items()} if chip_map else {}
         norm_ram_map = {normalize_name(k): v for k, v in ram_map.items()} if ram_map else {}
+        ram_keys = list(norm_ram_map)
+        # Partition wiki chip keys by family once, so fuzzy matching only compares within a family
+        chip_keys_by_family = {}
+        for k in norm_chip_map:
+            chip_keys_by_family.setdefault(get_ipad_family_norm(k), []).append(k)
+        # Fuzzy-match every model that misses its override and exact Wiki entry up front, in batched cdist calls
+        norm_names = list(dict.fromkeys(normalize_name(m) for m in device_rows))
+        ram_misses = [n for n in norm_names if not (_MANUAL_RAM_NORM.get(n) or norm_ram_map.get(n))]
+        fuzzy_ram = batch_fuzzy_match(ram_misses, ram_keys, norm_ram_map)
+        chip_misses_by_family = {}
+        for n in norm_names:
+            if not (_MANUAL_CHIP_NORM.get(n) or norm_chip_map.get(n)):
+                chip_misses_by_family.setdefault(get_ipad_family_norm(n), []).append(n)
+        fuzzy_chip = {}
+        for family, misses in chip_misses_by_family.items():
+            fuzzy_chip.update(batch_fuzzy_match(misses, chip_keys_by_family.get(family, []), norm_chip_map))
         for model_name, rows in device_rows.items():
+            norm_model_name = normalize_name(model_name)
             skus = []
             chip = None
             ram = None
-            for row in rows:
-                sku = row[1]
-                sku = re.sub(r'-[A-Z]$', '', sku)
+            for _model_name, sku_raw, target, _platform, ram_db in rows:
+                sku = _SKU_SUFFIX_RE.sub('', sku_raw)
                 if sku not in skus:
                     skus.append(sku)
-                ram_db = row[4]
-                norm_model_name = normalize_name(model_name)
-                # RAM: Check manual override, then Wiki, then DB
+                # RAM: Check manual override, then exact Wiki match, then fuzzy Wiki match, then DB
                 if ram is None:
-                    ram = MANUAL_RAM_OVERRIDE.get(model_name)
-                    if not ram:
-                        if norm_ram_map:
-                            ram = norm_ram_map.get(norm_model_name)
-                            if not ram:
-                                close = difflib.get_close_matches(norm_model_name, norm_ram_map.keys(), n=1, cutoff=0.8)
-                                if close:
-                                    ram = norm_ram_map[close[0]]
+                    ram = _MANUAL_RAM_NORM.get(norm_model_name) or norm_ram_map.get(norm_model_name) or fuzzy_ram.get(norm_model_name)
                     if not ram and ram_db:
                         try:
                             ram_val = int(ram_db)
@@ -295,32 +421,29 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
                     if not ram:
                         ram = "Unknown"
                         unmatched_ram.append(model_name)
-                # CHIP: Check manual override first
+                # CHIP: Check manual override first, then exact Wiki match, then fuzzy match within the same family
                 if chip is None:
-                    chip = MANUAL_CHIP_OVERRIDE.get(model_name)
-                    if not chip:
-                        if norm_chip_map:
-                            family = get_ipad_family(norm_model_name)
-                            family_keys = [k for k in norm_chip_map.keys() if get_ipad_family(k) == family]
-                            chip = norm_chip_map.get(norm_model_name)
-                            if not chip:
-                                close = difflib.get_close_matches(norm_model_name, family_keys, n=1, cutoff=0.8)
-                                if close:
-                                    chip = norm_chip_map[close[0]]
-                    if not chip and row[2] in BOARD_CHIP_MAPPING:
-                        chip = BOARD_CHIP_MAPPING[row[2]]
+                    chip = _MANUAL_CHIP_NORM.get(norm_model_name) or norm_chip_map.get(norm_model_name) or fuzzy_chip.get(norm_model_name)
+                    if not chip and target in BOARD_CHIP_MAPPING:
+                        chip = BOARD_CHIP_MAPPING[target]
                     if chip and isinstance(chip, str):
                         chip = chip.replace('Bionic', '').strip()
             if model_name in MANUAL_SKU_OVERRIDE:
                 skus = MANUAL_SKU_OVERRIDE[model_name].split()
             # Sort SKUs by the numeric part after the comma
             def sku_sort_key(s):
-                m = re.match(r"iPad(\d+),(\d+)", s)
+                m = _SKU_SORT_RE.match(s)
                 return (int(m.group(1)), int(m.group(2))) if m else (s,)
             skus = sorted(skus, key=sku_sort_key)
             # Only include A12 or newer, or M-series chips
             if not is_chip_at_least_a12(chip):
                 continue
+            # Rows are already grouped by exact name, so a duplicate here is a second
+            # DB name that normalizes to the same model (e.g. differing only in punctuation)
+            if norm_model_name in seen_models:
+                duplicates.append(model_name)
+            else:
+                seen_models.add(norm_model_name)
             menu[model_name] = {
                 "sku": skus,
                 "chip": chip,
@@ -339,7 +462,8 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
         return {
             "date_generated": datetime.now().isoformat(),
             "xcode_version": xcode_version,
-            "total_menu": menu
+            "total_menu": menu,
+            "duplicates": duplicates
         }
     except sqlite3.Error as e:
         print(f"Database error: {e}")
@@ -351,58 +475,58 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
     finally:
         conn.close()
 
-def check_duplicate_keys(menu_data: Dict[str, Any]) -> List[str]:
-    """Check for duplicate keys in the menu data and return list of duplicates."""
-    keys = list(menu_data["total_menu"].keys())
-    duplicates = []
-    seen = set()
-    
-    for key in keys:
-        if key in seen:
-            duplicates.append(key)
+def write_json(path: str, data: Dict[str, Any], pretty: bool = True) -> None:
+    """Write data to path as JSON (2-space indented unless pretty is False), using orjson when installed."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if pretty:
+            json.dump(data, f, indent=2, ensure_ascii=False)
         else:
-            seen.add(key)
-    
-    return duplicates
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate apple/iPad.json from Xcode and Apple Wiki data.")
+    parser.add_argument("--no-cache", action="store_true", help=f"Ignore cached Apple Wiki data in {CACHE_DIR}/ and fetch it again")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of 2-space indented output")
+    args = parser.parse_args()
+
     os.makedirs("apple", exist_ok=True)
+    # Look for Xcode databases before starting the wiki fetch, so a missing Xcode exits immediately
     available_dbs = find_xcode_databases()
     if not available_dbs:
         print("Error: No Xcode device_traits.db found!")
         return
-    print("Available Xcode databases:")
-    for i, (version, path) in enumerate(available_dbs, 1):
-        print(f"{i}. {version} ({path})")
-    selected_version, selected_path = next(
-        ((v, p) for v, p in available_dbs if "Beta" in v or "Developer" in v),
-        available_dbs[-1]
-    )
-    print(f"\nUsing {selected_version} database...")
-    print("Fetching Apple Wiki data for iPad...")
+    # Fetch Apple Wiki data in the background while the selected Xcode is inspected
     session = create_retry_session()
-    wiki_raw = fetch_wiki_text(session, device_type="iPad")
-    wiki_devices = parse_wiki_devices(wiki_raw)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        wiki_future = executor.submit(load_wiki_devices, session, "iPad", not args.no_cache)
+        print("Available Xcode databases:")
+        for i, (version, path) in enumerate(available_dbs, 1):
+            print(f"{i}. {version} ({path})")
+        selected_version, selected_path = next(
+            ((v, p) for v, p in available_dbs if "Beta" in v or "Developer" in v),
+            available_dbs[-1]
+        )
+        print(f"\nUsing {selected_version} database...")
+        xcode_version_str = get_xcode_version_from_db_path(selected_path)
+        print("Fetching Apple Wiki data for iPad...")
+        wiki_devices = wiki_future.result()
     ram_map = { name: meta["ram"] for name, meta in wiki_devices.items() }
     chip_map = { name: meta["chip"] for name, meta in wiki_devices.items() }
     print(f"Generating iPad device menu (from {selected_version}) with RAM details...")
-    xcode_version_str = get_xcode_version_from_db_path(selected_path)
     menu_data = generate_device_menu_json(db_path=selected_path, ram_map=ram_map, chip_map=chip_map, xcode_version=xcode_version_str)
-    total_menu = {}
-    for model_name, info in menu_data["total_menu"].items():
-        total_menu[model_name] = {
-            "sku": info["sku"],
-            "chip": info["chip"],
-            "ram": info["ram"]
-        }
+    # Menu entries already hold exactly sku/chip/ram, so reuse them without copying
     final = {
         "date_generated": menu_data["date_generated"],
-        "xcode_version": xcode_version_str,
-        "total_menu": total_menu
+        "xcode_version": menu_data["xcode_version"],
+        "total_menu": menu_data["total_menu"]
     }
     
-    # Check for duplicate keys
-    duplicates = check_duplicate_keys(final)
+    # Report models that collided while building the menu
+    duplicates = menu_data.get("duplicates", [])
     if duplicates:
         print(f"\n⚠️  WARNING: Found {len(duplicates)} duplicate keys:")
         for dup in duplicates:
@@ -411,19 +535,12 @@ def main():
     else:
         print(f"\n✅ All {len(final['total_menu'])} keys are unique!")
     
-    with open("apple/iPad.json", "w") as f:
-        json.dump(final, f, indent=2)
+    write_json("apple/iPad.json", final, pretty=not args.compact)
     print(f"Done — iPad menu saved to apple/iPad.json (using {selected_version})")
     print("Warning: BOARD_CHIP_MAPPING may be incomplete for iPad. Please review chip assignments.")
 
     # Final count of devices
-    try:
-        with open("apple/iPad.json", 'r') as f:
-            data = json.load(f)
-            count = len(data.get("total_menu", {}))
-            print(f"\nTotal iPad models generated: {count}")
-    except (FileNotFoundError, json.JSONDecodeError):
-        print("\nCould not read file to count devices.")
+    print(f"\nTotal iPad models generated: {len(final['total_menu'])}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -5,11 +5,21 @@ import difflib
 import os
 import json
 import glob
+import argparse
+import hashlib
 from datetime import datetime
+from pathlib import Path
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, Tuple
 import subprocess
+import plistlib
+import functools
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
 
 # --- Apple Wiki Data ---
 # This script generates Mac device specifications for M1 and newer models only
@@ -17,6 +27,8 @@ APPLE_WIKI_API_URL = "https://theapplewiki.com/api.php"
 APPLE_WIKI_PAGES = {
     "Mac": "List_of_Macs",
 }
+# (connect, read) timeout in seconds for Apple Wiki API requests
+WIKI_REQUEST_TIMEOUT = (5, 30)
 
 # Board config to chip mapping for Macs (M1 and newer only)
 BOARD_CHIP_MAPPING = {
@@ -126,19 +138,35 @@ MANUAL_SKU_OVERRIDE = {
     "Mac Studio (M3 Ultra)": "Mac15,17 Mac15,18"
 }
 
+# (chip, ram) overrides per model, so the menu loop needs one lookup per row instead of two
+_MANUAL_OVERRIDES = {
+    k: (MANUAL_CHIP_OVERRIDE.get(k), MANUAL_RAM_OVERRIDE.get(k))
+    for k in {**MANUAL_CHIP_OVERRIDE, **MANUAL_RAM_OVERRIDE}
+}
+
+# Board config keys, longest first, so the first prefix hit is the longest match
+_SORTED_BOARD_KEYS = sorted(BOARD_CHIP_MAPPING, key=len, reverse=True)
+
+# Prefixes grouped by (length, chip), longest group first, for one C-level startswith(tuple) per group
+_BOARD_GROUPS = {}
+for _prefix in _SORTED_BOARD_KEYS:
+    _BOARD_GROUPS.setdefault((len(_prefix), BOARD_CHIP_MAPPING[_prefix]), []).append(_prefix)
+_BOARD_STARTSWITH = [(tuple(prefixes), chip) for (_, chip), prefixes in _BOARD_GROUPS.items()]
+
 def get_chip_from_board_config(target: str) -> str:
     """Get the chip name from the board config (target)."""
     if target in BOARD_CHIP_MAPPING:
         return BOARD_CHIP_MAPPING[target]
     
-    for prefix, chip in BOARD_CHIP_MAPPING.items():
-        if target.startswith(prefix):
+    for prefixes, chip in _BOARD_STARTSWITH:
+        if target.startswith(prefixes):
             return chip
     
     return "Unknown"
 
+@functools.lru_cache(maxsize=64)
 def is_m1_or_newer(chip: str) -> bool:
-    """Return True if chip is M1 or newer (M1, M1 Pro, M1 Max, M1 Ultra, M2, M3, M4, etc.)."""
+    """Return True if chip is M1 or newer (M1, M1 Pro, M1 Max, M1 Ultra, M2, M3, M4, etc.). Memoized: only a few distinct chip strings occur."""
     if not chip or chip == "Unknown":
         return False
     chip = chip.strip().upper()
@@ -146,8 +174,9 @@ def is_m1_or_newer(chip: str) -> bool:
         return True
     return False
 
-def find_xcode_databases() -> List[Tuple[str, str]]:
-    """Find all available Xcode device_traits.db files."""
+@functools.lru_cache(maxsize=1)
+def find_xcode_databases() -> Tuple[Tuple[str, str], ...]:
+    """Find all available Xcode device_traits.db files (memoized, as a hashable tuple)."""
     databases = []
     # Check standard Xcode - Mac devices are in iPhoneOS platform
     standard_path = "/Applications/Xcode.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
@@ -160,12 +189,52 @@ def find_xcode_databases() -> List[Tuple[str, str]]:
         version = os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(path))))))
         databases.append((version, path))
     
-    return sorted(databases, key=lambda x: x[0])
+    return tuple(sorted(databases, key=lambda x: x[0]))
 
 # --- Xcode device_traits.db ---
 # Note: Mac devices are stored in the iPhoneOS platform database
 DEFAULT_DB_PATH = "/Applications/Xcode.app/Contents/Developer/Platforms/iPhoneOS.platform/usr/standalone/device_traits.db"
 
+# --- On-disk cache for Apple Wiki data ---
+CACHE_DIR = ".cache"
+# Raw wikitext plus the ETag/Last-Modified validators it was served with
+WIKI_CACHE_PATH = os.path.join(CACHE_DIR, "mac_wiki.json")
+# Last parse of the wikitext, tagged with the hash of the text and parser version it came from
+WIKI_PARSE_CACHE_PATH = os.path.join(CACHE_DIR, "mac_devices.json")
+# Bump whenever parse_wiki_devices' output changes, so parses cached by an older version are not reused
+WIKI_PARSE_VERSION = 1
+
+def get_cache_key(key: str) -> str:
+    """Return the SHA-256 hex digest identifying a cache entry."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def write_cache_json(path: str, data: Any) -> None:
+    """Write data to a cache file through a temporary file and os.replace, so an interrupted run never leaves it truncated."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+# --- Precompiled patterns for Apple Wiki parsing and SKU cleanup ---
+_M_CHIP_RE = re.compile(r'\bM\d+(?:\s*(?:Pro|Max|Ultra))?\b')
+_RAM_NORM_RE = re.compile(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?')
+# Section headers, CPU lines and RAM lines, matched in a single pass over the wikitext.
+# CPU and RAM values are captured in lookaheads that never run past the next section header, so
+# they read exactly what a search confined to the section would, without consuming that text.
+_WIKI_TOKEN_RE = re.compile(
+    r'==\s*\[\[(?P<name>.*?)\]\]\s*=='
+    r'|\*\s*CPU:(?=\s*(?:\[\[(?P<cpu_link>(?:(?!==\s*\[\[.*?\]\]\s*==).)*?)\]\]\s*)?"?(?P<cpu>[\w\d\s\-+]+))'
+    r'|(?i:\*\s*RAM:(?=\s*(?P<ram>(?:(?!==\s*\[\[.*?\]\]\s*==)[^\n\r])*)))'
+)
+_MAC_RE = re.compile(r'Mac', re.IGNORECASE)
+_SKU_TAIL_RE = re.compile(r'-[A-Z]$')
+_NORM_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize_name(name):
+    """Lowercase and drop punctuation and spaces, so near-identical model names share a key."""
+    return _NORM_RE.sub('', name.lower())
+
 def create_retry_session():
     """Create a requests session with retry logic."""
     session = requests.Session()
@@ -176,8 +245,23 @@ def create_retry_session():
     session.mount("https://", adapter)
     return session
 
-def fetch_wiki_text(session, device_type="Mac"):
-    """Fetch Mac device data from Apple Wiki."""
+def load_wiki_cache() -> Optional[Dict[str, Any]]:
+    """Return the cached wikitext entry from WIKI_CACHE_PATH, or None if missing or unreadable."""
+    if not os.path.exists(WIKI_CACHE_PATH):
+        return None
+    try:
+        with open(WIKI_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached if isinstance(cached.get("text"), str) else None
+    except (json.JSONDecodeError, AttributeError) as e:
+        print(f"Warning: ignoring unreadable wiki cache {WIKI_CACHE_PATH}: {e}")
+        return None
+
+def fetch_wiki_text(session, device_type="Mac", use_cache=True):
+    """
+    Fetch Mac device data from Apple Wiki. With use_cache, the request is made conditional on
+    the cached copy's ETag/Last-Modified, and a 304 response returns the cached text.
+    """
     params = {
         "action": "query",
         "titles": APPLE_WIKI_PAGES[device_type],
@@ -185,13 +269,30 @@ def fetch_wiki_text(session, device_type="Mac"):
         "rvprop": "content",
         "format": "json"
     }
-    resp = session.get(APPLE_WIKI_API_URL, params=params)
+    cached = load_wiki_cache() if use_cache else None
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    resp = session.get(APPLE_WIKI_API_URL, params=params, headers=headers, timeout=WIKI_REQUEST_TIMEOUT)
+    if cached and resp.status_code == 304:
+        return cached["text"]
     resp.raise_for_status()
     data = resp.json()
     pages = data["query"]["pages"]
     for page_id in pages:
         if "revisions" in pages[page_id]:
-            return pages[page_id]["revisions"][0]["*"]
+            text = pages[page_id]["revisions"][0]["*"]
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(WIKI_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "text": text
+                }, f)
+            return text
     raise RuntimeError("Wiki text not found!")
 
 def standardize_ram(ram_str):
@@ -199,7 +300,7 @@ def standardize_ram(ram_str):
     if ram_str == "Unknown":
         return ram_str
     ram_str = ram_str.strip().upper()
-    match = re.search(r'(\d+)\s*(GB|MB|G|M)(?:\s*(?:LPDDR\d+X)?)?', ram_str)
+    match = _RAM_NORM_RE.search(ram_str)
     if not match:
         return ram_str
     number, unit = match.groups()
@@ -209,48 +310,79 @@ def standardize_ram(ram_str):
         unit = 'MB'
     return f"{number} {unit}"
 
-def extract_chip(block):
-    """Extract chip information from wiki block."""
-    chip_match = re.search(r'\*\s*CPU:\s*(?:\[\[(.*?)\]\]\s*)?\"?([\w\d\s\-+]+)\"?', block)
-    if not chip_match:
+def chip_from_cpu(cpu):
+    """Return the M-series chip named in a wiki CPU field, or 'Unknown'."""
+    if cpu is None:
         return "Unknown"
-    chip = chip_match.group(2).strip()
-    
-    # Look for M-series chips first (M1, M1 Pro, M1 Max, M1 Ultra, M2, M3, M4, etc.)
-    m_chip_match = re.search(r'\bM\d+(?:\s*(?:Pro|Max|Ultra))?\b', chip)
+    # Look for M-series chips (M1, M1 Pro, M1 Max, M1 Ultra, M2, M3, M4, etc.)
+    m_chip_match = _M_CHIP_RE.search(cpu)
     if m_chip_match:
         return m_chip_match.group(0)
-    
     return "Unknown"
 
+def add_wiki_device(data, raw_text, name, start, end, cpu, ram):
+    """Record the section raw_text[start:end] under name if it describes an M1+ (or unknown-chip) Mac."""
+    if name is None or name.startswith("File:"):
+        return
+    # Only include Mac models
+    if not (_MAC_RE.search(name) or _MAC_RE.search(raw_text, start, end)):
+        return
+    chip = chip_from_cpu(cpu)
+    # Only include M1 and newer chips (M1, M1 Pro, M1 Max, M1 Ultra, M2, M2 Pro, M2 Max, M2 Ultra, M3, M3 Pro, M3 Max, M3 Ultra, M4, etc.)
+    if not (chip.startswith("M") or chip == "Unknown"):
+        return
+    data[name] = {
+        "chip": chip,
+        "ram": standardize_ram(ram if ram is not None else "Unknown")
+    }
+
 def parse_wiki_devices(raw_text):
-    """Parse Mac devices from wiki text."""
-    entries = re.split(r"==\s*\[\[(.*?)\]\]\s*==", raw_text)
+    """
+    Parse Mac devices from wiki text in one pass over '== [[name]] ==' sections,
+    taking the first CPU and RAM line of each section.
+    """
     data = {}
-    for i in range(1, len(entries), 2):
-        name = entries[i].strip()
-        block = entries[i + 1]
-        if name.startswith("File:"): 
-            continue
-        
-        # Only include Mac models
-        if not (re.search(r"Mac", name, re.IGNORECASE) or re.search(r"Mac", block, re.IGNORECASE)):
-            continue
-        
-        chip = extract_chip(block)
-        
-        # Only include M1 and newer chips (M1, M1 Pro, M1 Max, M1 Ultra, M2, M2 Pro, M2 Max, M2 Ultra, M3, M3 Pro, M3 Max, M3 Ultra, M4, etc.)
-        if not (chip.startswith("M") or chip == "Unknown"):
-            continue
-        
-        ram_match = re.search(r"\*\s*RAM:\s*(.*?)\s*(?:\n|\r|$)", block, re.IGNORECASE)
-        ram = ram_match.group(1).strip() if ram_match else "Unknown"
-        ram = standardize_ram(ram)
-        
-        data[name] = {
-            "chip": chip,
-            "ram": ram
-        }
+    name = None
+    start = 0
+    cpu = ram = None
+    for match in _WIKI_TOKEN_RE.finditer(raw_text):
+        if match.group("name") is not None:
+            add_wiki_device(data, raw_text, name, start, match.start(), cpu, ram)
+            name = match.group("name").strip()
+            start = match.end()
+            cpu = ram = None
+        elif match.group("cpu") is not None:
+            if cpu is None:
+                cpu = match.group("cpu").strip()
+        elif ram is None:
+            ram = match.group("ram").strip()
+    add_wiki_device(data, raw_text, name, start, len(raw_text), cpu, ram)
+    return data
+
+def parse_wiki_devices_cached(raw_text, use_cache=True):
+    """
+    Parse Mac devices from wiki text, reusing the previous parse if it came from the same wikitext.
+    WIKI_PARSE_CACHE_PATH holds a single parse keyed by the hash of the raw text and WIKI_PARSE_VERSION,
+    so any page or parser change invalidates it and the new parse replaces it.
+    An unreadable cache file is treated as a miss.
+    """
+    key = get_cache_key(f"{WIKI_PARSE_VERSION}\n{raw_text}")
+    if use_cache and os.path.exists(WIKI_PARSE_CACHE_PATH):
+        try:
+            with open(WIKI_PARSE_CACHE_PATH, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == key and isinstance(cached.get("devices"), dict):
+                return cached["devices"]
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            print(f"Warning: ignoring unreadable parse cache {WIKI_PARSE_CACHE_PATH}: {e}")
+    data = parse_wiki_devices(raw_text)
+    write_cache_json(WIKI_PARSE_CACHE_PATH, {"key": key, "devices": data})
+    # Earlier versions kept one hash-named parse file per page revision; drop any left behind
+    for stale_path in glob.glob(os.path.join(CACHE_DIR, "*.mac.json")):
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
     return data
 
 def get_db_connection(db_path: str = DEFAULT_DB_PATH) -> Optional[sqlite3.Connection]:
@@ -259,14 +391,25 @@ def get_db_connection(db_path: str = DEFAULT_DB_PATH) -> Optional[sqlite3.Connec
         print(f"Warning: device_traits.db not found at {db_path}")
         return None
     try:
-        return sqlite3.connect(db_path)
+        # Read-only, immutable open: no journal, no file locking and no implicit BEGIN for this read-only workload.
+        # as_uri() percent-escapes the path, so characters like '#' or '?' can't be read as URI syntax.
+        uri = f"{Path(db_path).absolute().as_uri()}?mode=ro&immutable=1"
+        return sqlite3.connect(uri, uri=True, isolation_level=None)
     except sqlite3.Error as e:
         print(f"Error connecting to database: {e}")
         return None
 
+@functools.lru_cache(maxsize=16)
 def get_xcode_version_from_db_path(db_path: str) -> str:
-    """Extract Xcode version from database path."""
+    """Extract Xcode version from database path, from version.plist or else xcodebuild (memoized)."""
     xcode_root = db_path.split("/Contents/")[0] + "/Contents"
+    # version.plist carries the same version and build as `xcodebuild -version`, without spawning a process
+    try:
+        with open(os.path.join(xcode_root, "version.plist"), "rb") as f:
+            info = plistlib.load(f)
+        return f"Version {info['CFBundleShortVersionString']} ({info['ProductBuildVersion']})"
+    except (OSError, plistlib.InvalidFileException, KeyError):
+        pass
     xcodebuild_path = os.path.join(xcode_root, "Developer/usr/bin/xcodebuild")
     if os.path.exists(xcodebuild_path):
         try:
@@ -280,20 +423,90 @@ def get_xcode_version_from_db_path(db_path: str) -> str:
             return f"Unknown (error: {e})"
     return "Unknown"
 
-def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str, str] = None, chip_map: Dict[str, str] = None, xcode_version: str = "Xcode") -> Dict[str, Any]:
+def lookup_wiki_field(wiki_devices, norm_wiki_devices, model_name, norm_model_name, field):
+    """Return a Wiki field ('chip' or 'ram') for a model, matching its name exactly, normalized, then via difflib."""
+    value = (wiki_devices.get(model_name) or {}).get(field) or (norm_wiki_devices.get(norm_model_name) or {}).get(field)
+    if not value:
+        close = difflib.get_close_matches(model_name, wiki_devices.keys(), n=1, cutoff=0.8)
+        if close:
+            value = wiki_devices[close[0]][field]
+    return value
+
+def _make_row_processor(manual_overrides, wiki_devices, norm_wiki_devices, unmatched_chips, unmatched_ram):
+    """
+    Return a function mapping one Devices row (a sqlite3.Row) to (model_name, menu entry), or None for pre-M1 Macs.
+    The lookup tables and helpers are bound as closure variables, so the per-row code reads them
+    as locals instead of resolving module globals every time.
+    """
+    no_override = (None, None)
+    get_override = manual_overrides.get
+    normalize = normalize_name
+    board_chip = get_chip_from_board_config
+    m1_or_newer = is_m1_or_newer
+    lookup = lookup_wiki_field
+    strip_sku_tail = _SKU_TAIL_RE.sub
+
+    def process(row):
+        model_name = row["ProductDescription"]
+        sku = row["ProductType"]
+        target = row["Target"]
+        norm_model_name = normalize(model_name)
+        chip_override, ram_override = get_override(model_name, no_override)
+        
+        # Get chip from manual override, wiki, or board config
+        chip = chip_override
+        if not chip and wiki_devices:
+            chip = lookup(wiki_devices, norm_wiki_devices, model_name, norm_model_name, "chip")
+        
+        if not chip:
+            chip = board_chip(target)
+            if chip == "Unknown":
+                unmatched_chips.append(model_name)
+        
+        # Only include M1 and newer Macs; skip the RAM lookup for anything filtered out
+        if not m1_or_newer(chip):
+            return None
+        
+        # Get RAM from manual override, wiki, or default
+        ram = ram_override
+        if not ram and wiki_devices:
+            ram = lookup(wiki_devices, norm_wiki_devices, model_name, norm_model_name, "ram")
+        
+        if not ram:
+            # Default RAM for M1+ Macs based on chip type
+            if chip and "Pro" in chip:
+                ram = "16 GB"
+            elif chip and "Max" in chip:
+                ram = "32 GB"
+            elif chip and "Ultra" in chip:
+                ram = "64 GB"
+            else:
+                ram = "8 GB"  # Default for base M1/M2/M3/M4
+            unmatched_ram.append(model_name)
+        
+        # Clean up SKU format
+        return model_name, {
+            "sku": strip_sku_tail('', sku),
+            "chip": chip,
+            "ram": ram
+        }
+
+    return process
+
+def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, wiki_devices: Dict[str, Dict[str, str]] = None, xcode_version: str = "Xcode") -> Dict[str, Any]:
     """Generate Mac device menu JSON."""
     conn = get_db_connection(db_path)
     if not conn:
         return { "date_generated": datetime.now().isoformat(), "xcode_version": xcode_version, "total_menu": {} }
     
     try:
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("""
             SELECT 
                 d.ProductDescription,
                 d.ProductType,
-                d.Target,
-                d.Platform
+                d.Target
             FROM Devices d
             WHERE d.ProductType LIKE 'Mac%'
             ORDER BY d.ProductType DESC
@@ -302,60 +515,15 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
         menu = {}
         unmatched_chips = []
         unmatched_ram = []
+        # Normalized Wiki keys, tried before the much slower difflib fallback
+        norm_wiki_devices = {normalize_name(k): v for k, v in wiki_devices.items()} if wiki_devices else {}
         
-        for row in cursor.fetchall():
-            model_name = row[0]
-            sku = row[1]
-            target = row[2]
-            platform = row[3]
-            
-            # Get chip from manual override, wiki, or board config
-            chip = MANUAL_CHIP_OVERRIDE.get(model_name)
-            if not chip and chip_map:
-                chip = chip_map.get(model_name)
-                if not chip:
-                    close = difflib.get_close_matches(model_name, chip_map.keys(), n=1, cutoff=0.8)
-                    if close:
-                        chip = chip_map[close[0]]
-            
-            if not chip:
-                chip = get_chip_from_board_config(target)
-                if chip == "Unknown":
-                    unmatched_chips.append(model_name)
-            
-            # Get RAM from manual override, wiki, or default
-            ram = MANUAL_RAM_OVERRIDE.get(model_name)
-            if not ram and ram_map:
-                ram = ram_map.get(model_name)
-                if not ram:
-                    close = difflib.get_close_matches(model_name, ram_map.keys(), n=1, cutoff=0.8)
-                    if close:
-                        ram = ram_map[close[0]]
-            
-            if not ram:
-                # Default RAM for M1+ Macs based on chip type
-                if chip and "Pro" in chip:
-                    ram = "16 GB"
-                elif chip and "Max" in chip:
-                    ram = "32 GB"
-                elif chip and "Ultra" in chip:
-                    ram = "64 GB"
-                else:
-                    ram = "8 GB"  # Default for base M1/M2/M3/M4
-                unmatched_ram.append(model_name)
-            
-            # Clean up SKU format
-            sku = re.sub(r'-[A-Z]$', '', sku)
-            
-            # Only include M1 and newer Macs
-            if not is_m1_or_newer(chip):
-                continue
-            
-            menu[model_name] = {
-                "sku": sku,
-                "chip": chip,
-                "ram": ram
-            }
+        process_row = _make_row_processor(_MANUAL_OVERRIDES, wiki_devices or {}, norm_wiki_devices, unmatched_chips, unmatched_ram)
+        for row in cursor:
+            result = process_row(row)
+            if result is not None:
+                model_name, entry = result
+                menu[model_name] = entry
         
         if unmatched_chips:
             print("\nDevices with unmatched chip:")
@@ -383,8 +551,31 @@ def generate_device_menu_json(db_path: str = DEFAULT_DB_PATH, ram_map: Dict[str,
     finally:
         conn.close()
 
+def write_json(path: str, data: Dict[str, Any], pretty: bool = True) -> None:
+    """Write data to path as JSON (2-space indented unless pretty is False), using orjson when installed."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if pretty:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+
+def fetch_wiki_devices(session, use_cache=True) -> Dict[str, Dict[str, str]]:
+    """Fetch and parse the Apple Wiki Mac page (both steps cached, see fetch_wiki_text)."""
+    wiki_raw = fetch_wiki_text(session, device_type="Mac", use_cache=use_cache)
+    return parse_wiki_devices_cached(wiki_raw, use_cache=use_cache)
+
 def main():
     """Main function to generate Mac device specifications (M1 and newer only)."""
+    parser = argparse.ArgumentParser(description="Generate apple/Mac.json (M1 and newer) from Xcode and Apple Wiki data.")
+    parser.add_argument("--no-cache", action="store_true", help=f"Ignore cached Apple Wiki data in {CACHE_DIR}/ and fetch it again")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of 2-space indented output")
+    args = parser.parse_args()
+    use_cache = not args.no_cache
+    
     os.makedirs("apple", exist_ok=True)
     
     # Find available Xcode databases
@@ -403,30 +594,23 @@ def main():
         available_dbs[-1]
     )
     print(f"\nUsing {selected_version} database...")
+    xcode_version_str = get_xcode_version_from_db_path(selected_path)
     
     # Fetch Apple Wiki data for Macs
     print("Fetching Apple Wiki data for Mac...")
     try:
         session = create_retry_session()
-        wiki_raw = fetch_wiki_text(session, device_type="Mac")
-        wiki_devices = parse_wiki_devices(wiki_raw)
-        
-        ram_map = {name: meta["ram"] for name, meta in wiki_devices.items()}
-        chip_map = {name: meta["chip"] for name, meta in wiki_devices.items()}
-        
+        wiki_devices = fetch_wiki_devices(session, use_cache)
         print(f"Found {len(wiki_devices)} Mac models in Wiki data")
     except Exception as e:
         print(f"Warning: Could not fetch Wiki data: {e}")
-        ram_map = {}
-        chip_map = {}
+        wiki_devices = {}
     
     # Generate the device menu JSON
     print(f"Generating Mac device menu (from {selected_version})...")
-    xcode_version_str = get_xcode_version_from_db_path(selected_path)
     menu_data = generate_device_menu_json(
         db_path=selected_path, 
-        ram_map=ram_map, 
-        chip_map=chip_map, 
+        wiki_devices=wiki_devices, 
         xcode_version=xcode_version_str
     )
     
@@ -455,19 +639,12 @@ def main():
         print(f"Generated {len(manual_menu)} Mac models from manual overrides")
     
     # Save to file
-    with open("apple/Mac.json", "w") as f:
-        json.dump(menu_data, f, indent=2)
+    write_json("apple/Mac.json", menu_data, pretty=not args.compact)
     
     print(f"Done — Mac menu saved to apple/Mac.json (using {selected_version})")
     
-    # Final count
-    try:
-        with open("apple/Mac.json", 'r') as f:
-            data = json.load(f)
-            count = len(data.get("total_menu", {}))
-            print(f"\nTotal M1+ Mac models generated: {count}")
-    except (FileNotFoundError, json.JSONDecodeError):
-        print("\nCould not read file to count devices.")
+    # Final count, from the in-memory menu that was just written
+    print(f"\nTotal M1+ Mac models generated: {len(menu_data.get('total_menu', {}))}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file